@@ -3,6 +3,7 @@
 # dependencies = [
 #     "diskcache>=5.6.3",
 #     "diskstore",
+#     "numpy",
 # ]
 #
 # [tool.uv.sources]
@@ -13,20 +14,21 @@
 $ export PYTHONPATH=/Users/grantj/repos/python-diskcache
 $ python tests/benchmark_core.py -p 1 > tests/timings_core_p1.txt
 $ python tests/benchmark_core.py -p 8 > tests/timings_core_p8.txt
-"""
 
-import collections as co
+The databases are created in /dev/shm if it exists, so the filesystem is not
+part of the measurement. Set TMPDIR to benchmark a real disk instead:
+
+$ TMPDIR=/var/tmp uv run scripts/benchmark_core.py -p 1
+"""
 
 # from codecs import ignore_errors
 import json
 import multiprocessing as mp
 import os
-import pickle
-import random
-import shutil
 import tempfile
 import time
 
+import numpy as np
 from utils import display
 
 PROCS = 8
@@ -34,6 +36,8 @@ OPS = int(1e5)
 RANGE = 100
 WARMUP = int(1e3)
 SIZE = 1024
+ACTIONS = ("get", "set", "delete")
+MISS = object()  # own sentinel, DiskStore.pop treats const.MISSING as no default
 
 example_data = json.dumps(
     json.loads("""
@@ -108,62 +112,82 @@ import diskcache
 import diskstore
 
 
-def worker(num, kind, args, kwargs):
-    random.seed(num)
+def worker(num, results, kind, args, kwargs, ops, key_range, warmup):
+    # pin every worker to its own core, keeps the hot pages in that core's cache
+    if hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cpus[num % len(cpus)]})
+
+    # draw all random numbers up front, outside of the timed loop
+    rng = np.random.default_rng(num)
+    key_bytes = [str(key).encode("utf-8") for key in range(key_range)]
+    keys = [key_bytes[index] for index in rng.integers(0, key_range, size=ops).tolist()]
+    choices = rng.random(size=ops).tolist()
 
     time.sleep(0.01)  # Let other processes start.
 
     obj = kind(*args, **kwargs)
 
-    timings = co.defaultdict(list)
+    # nanosecond deltas, action code (index in ACTIONS) and miss flag per op
+    deltas = np.zeros(ops, dtype=np.int64)
+    actions = np.zeros(ops, dtype=np.int8)
+    misses = np.zeros(ops, dtype=np.bool_)
     value = example_data
+    perf_counter_ns = time.perf_counter_ns  # local lookup in the timed loop
 
-    for count in range(OPS):
-        key = str(random.randrange(RANGE)).encode("utf-8")
-        # value = str(count).encode("utf-8") * random.randrange(1, 100)
-        choice = random.random()
+    for count in range(ops):
+        key = keys[count]
+        choice = choices[count]
 
         if choice < 0.900:
-            start = time.time()
-            result = None
-            try:
-                result = obj[key]
-            except KeyError:
-                pass
-            end = time.time()
-            miss = result is None
-            action = "get"
+            start = perf_counter_ns()
+            result = obj.get(key, MISS)
+            delta = perf_counter_ns() - start
+            miss = result is MISS
+            action = 0
         elif choice < 0.990:
-            start = time.time()
+            start = perf_counter_ns()
             result = obj[key] = value
-            end = time.time()
+            delta = perf_counter_ns() - start
             miss = result is False
-            action = "set"
+            action = 1
         else:
-            start = time.time()
-            miss = False
-            try:
-                del obj[key]
-            except KeyError:
-                miss = True
-            end = time.time()
-            action = "delete"
+            start = perf_counter_ns()
+            result = obj.pop(key, MISS)
+            delta = perf_counter_ns() - start
+            miss = result is MISS
+            action = 2
 
-        if count > WARMUP:
-            delta = end - start
-            timings[action].append(delta)
-            if miss:
-                timings[action + "-miss"].append(delta)
+        deltas[count] = delta
+        actions[count] = action
+        misses[count] = miss
 
-    with open("output-%d.pkl" % num, "wb") as writer:
-        pickle.dump(timings, writer, protocol=pickle.HIGHEST_PROTOCOL)
+    deltas = deltas[warmup + 1 :]
+    actions = actions[warmup + 1 :]
+    misses = misses[warmup + 1 :]
+    timings = {}
+
+    for code, action in enumerate(ACTIONS):
+        selected = actions == code
+        timings[action] = deltas[selected]
+        timings[action + "-miss"] = deltas[selected & misses]
+
+    results.put(timings)
 
 
 def dispatch():
-    # tmp_directory = "/data/tmp/bench"
-    # os.makedirs(tmp_directory)
-    tmp_directory = tempfile.mkdtemp(prefix="diskstore_bench-")
+    # RAM backed /dev/shm by default, TMPDIR overrides it
+    tmp_root = None
+    if not os.environ.get("TMPDIR") and os.path.isdir("/dev/shm"):
+        tmp_root = "/dev/shm"
+
+    with tempfile.TemporaryDirectory(
+        prefix="diskstore_bench-", dir=tmp_root
+    ) as tmp_directory:
+        bench(tmp_directory)
+
 
+def bench(tmp_directory):
     caches.append(
         (
             "diskstore.DiskStore",
@@ -197,32 +221,31 @@ def dispatch():
         except Exception:
             pass
 
+        results = mp.Queue()
         processes = [
-            mp.Process(target=worker, args=(value, kind, args, kwargs))
+            mp.Process(
+                target=worker,
+                args=(value, results, kind, args, kwargs, OPS, RANGE, WARMUP),
+            )
             for value in range(PROCS)
         ]
 
         for process in processes:
             process.start()
 
+        # drain results before join, a process with pending queue data never exits
+        outputs = [results.get() for _ in range(PROCS)]
+
         for process in processes:
             process.join()
 
-        timings = co.defaultdict(list)
-
-        for num in range(PROCS):
-            filename = "output-%d.pkl" % num
-
-            with open(filename, "rb") as reader:
-                output = pickle.load(reader)
-
-            for key in output:
-                timings[key].extend(output[key])
-
-            os.remove(filename)
+        # one copy per action, nanoseconds to seconds for display
+        timings = {
+            key: np.concatenate([output[key] for output in outputs]) / 1e9
+            for key in outputs[0]
+        }
 
         display(name, timings)
-    shutil.rmtree(tmp_directory, ignore_errors=True)
 
 
 if __name__ == "__main__":
@@ -267,4 +290,10 @@ if __name__ == "__main__":
     RANGE = int(args.range)
     WARMUP = int(args.warmup)
     print("len example_data:", len(example_data))
+
+    # fork workers from a server process with the heavy imports done once
+    if "forkserver" in mp.get_all_start_methods():
+        mp.set_start_method("forkserver")
+        mp.set_forkserver_preload(["diskstore", "diskcache", "numpy"])
+
     dispatch()
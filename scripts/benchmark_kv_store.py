@@ -21,6 +21,7 @@ import timeit
 import diskcache
 
 import diskstore
+import diskstore.config
 
 N = 100
 R = 7
@@ -41,6 +42,16 @@ bench("set", "", "ds['key'] = value")
 bench("get", "", "ds['key']")
 bench("set/delete", "", "ds['key'] = value; del ds['key']")
 
+print("\ndiskstore memory set")
+# in-memory DB without fsync, shows pure Python + SQLite overhead without disk I/O
+ds_mem = diskstore.DiskStore(
+    "file:/diskstore_bench_kv?vfs=memdb",
+    diskstore.config.BaseConfig(pragmas={"synchronous": 0}),
+)
+bench("set", "", "ds_mem['key'] = value")
+bench("get", "", "ds_mem['key']")
+bench("set/delete", "", "ds_mem['key'] = value; del ds_mem['key']")
+
 print("\ndiskcache set")
 dc = diskcache.Cache("/tmp/diskcache")
 bench("set", "", "dc['key'] = value")
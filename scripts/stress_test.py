@@ -3,14 +3,13 @@
 import collections as co
 import multiprocessing as mp
 import os
-import pickle
-import queue
 import random
 import shutil
 import sqlite3
 import threading
 import time
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 
 from diskstore import DiskStore, config
@@ -20,29 +19,31 @@ GET_AVERAGE = 100
 KEY_COUNT = 10
 DEL_CHANCE = 0.1
 WARMUP = 10
+BATCH = 10_000  # keys/values are generated with one random.choices call per batch
 filename = "/tmp/diskstore_stress_test.db"
+MISS = object()  # own sentinel, DiskStore.pop treats const.MISSING as no default
 
 
-def make_keys():
+def make_keys(rng):
     def make_int():
-        return random.randrange(1_000_000)
+        return rng.randrange(1_000_000)
 
     def make_unicode():
-        word_size = random.randint(1, 26)
-        word = "".join(random.sample("abcdefghijklmnopqrstuvwxyz", word_size))
-        size = random.randint(1, int(200 / 13))
+        word_size = rng.randint(1, 26)
+        word = "".join(rng.sample("abcdefghijklmnopqrstuvwxyz", word_size))
+        size = rng.randint(1, int(200 / 13))
         return word * size
 
     def make_bytes():
-        word_size = random.randint(1, 26)
-        word = "".join(random.sample("abcdefghijklmnopqrstuvwxyz", word_size)).encode(
+        word_size = rng.randint(1, 26)
+        word = "".join(rng.sample("abcdefghijklmnopqrstuvwxyz", word_size)).encode(
             "utf-8"
         )
-        size = random.randint(1, int(200 / 13))
+        size = rng.randint(1, int(200 / 13))
         return word * size
 
     def make_float():
-        return random.random()
+        return rng.random()
 
     funcs = [
         make_int,
@@ -52,37 +53,37 @@ def make_keys():
     ]
 
     while True:
-        func = random.choice(funcs)
-        yield func()
+        for func in rng.choices(funcs, k=BATCH):
+            yield func()
 
 
-def make_vals():
+def make_vals(rng):
     def make_int():
-        return random.randrange(int(1e9))
+        return rng.randrange(int(1e9))
 
     # def make_long():
-    #     value = random.randrange(int(1e9))
+    #     value = rng.randrange(int(1e9))
     #     return value << 64
 
     def make_unicode():
-        word_size = random.randint(1, 26)
-        word = "".join(random.sample("abcdefghijklmnopqrstuvwxyz", word_size))
-        size = random.randint(1, int(2**16 / 13))
+        word_size = rng.randint(1, 26)
+        word = "".join(rng.sample("abcdefghijklmnopqrstuvwxyz", word_size))
+        size = rng.randint(1, int(2**16 / 13))
         return word * size
 
     def make_bytes():
-        word_size = random.randint(1, 26)
-        word = "".join(random.sample("abcdefghijklmnopqrstuvwxyz", word_size)).encode(
+        word_size = rng.randint(1, 26)
+        word = "".join(rng.sample("abcdefghijklmnopqrstuvwxyz", word_size)).encode(
             "utf-8"
         )
-        size = random.randint(1, int(2**16 / 13))
+        size = rng.randint(1, int(2**16 / 13))
         return word * size
 
     def make_float():
-        return random.random()
+        return rng.random()
 
     # def make_object():
-    #     return [make_float()] * random.randint(1, int(2e3))
+    #     return [make_float()] * rng.randint(1, int(2e3))
 
     funcs = [
         make_int,
@@ -94,111 +95,99 @@ def make_vals():
     ]
 
     while True:
-        func = random.choice(funcs)
-        yield func()
+        for func in rng.choices(funcs, k=BATCH):
+            yield func()
 
 
-def key_ops():
-    keys = make_keys()
-    vals = make_vals()
-
-    key = next(keys)
+def key_ops(rng, key, get_average, del_chance):
+    vals = make_vals(rng)
 
     while True:
         value = next(vals)
         yield "set", key, value
-        for _ in range(int(random.expovariate(1.0 / GET_AVERAGE))):
+        for _ in range(int(rng.expovariate(1.0 / get_average))):
             yield "get", key, value
-        if random.random() < DEL_CHANCE:
+        if rng.random() < del_chance:
             yield "delete", key, None
 
 
-def all_ops():
-    keys = [key_ops() for _ in range(KEY_COUNT)]
+def all_ops(seed, num, operations, key_count, get_average, del_chance):
+    """Generate `operations` for worker `num` lazily.
+
+    All workers share the keys drawn from `seed`, the operations on them are
+    drawn from `seed + num + 1` so every worker is reproducible on its own.
+    """
+    keys = make_keys(random.Random(seed))
+    rng = random.Random(seed + num + 1)
+    key_ops_list = [
+        key_ops(rng, next(keys), get_average, del_chance) for _ in range(key_count)
+    ]
+    choice = rng.choice
 
-    for _ in range(OPERATIONS):
-        ops = random.choice(keys)
+    for _ in range(operations):
+        ops = choice(key_ops_list)
         yield next(ops)
 
 
-def worker(queue, processes, threads):
+def worker(cache, operations, processes, threads, warmup):
     timings = co.defaultdict(list)
-    # filename = "/tmp/diskstore_stress_test.db"
-    # with suppress(FileNotFoundError):
-    #     os.remove(filename)
-    cache = DiskStore(filename, config.BaseConfig(timeout=10))
+    perf_counter_ns = time.perf_counter_ns  # local lookup in the timed loop
 
-    for index, (action, key, value) in enumerate(iter(queue.get, None)):
-        start = time.time()
+    for index, (action, key, value) in enumerate(operations):
+        start = perf_counter_ns()
 
         try:
             if action == "set":
                 cache[key] = value
+                miss = False
             elif action == "get":
-                result = cache[key]
+                result = cache.get(key, MISS)
+                miss = result is MISS
             else:
                 assert action == "delete"
-                del cache[key]
+                miss = cache.pop(key, MISS) is MISS
         except sqlite3.OperationalError:
             miss = True
-        else:
-            miss = False
 
-        stop = time.time()
+        delta = perf_counter_ns() - start
 
         if action == "get" and processes == 1 and threads == 1:
             assert result == value
 
-        if index > WARMUP:
-            delta = stop - start
+        if index > warmup:
             timings[action].append(delta)
             if miss:
                 timings[action + "-miss"].append(delta)
 
-    queue.put(timings)
-
-    cache.close()
-
-
-def dispatch(num, processes, threads):
-    with open("input-%s.pkl" % num, "rb") as reader:
-        process_queue = pickle.load(reader)
-
-    thread_queues = [queue.Queue() for _ in range(threads)]
-    subthreads = [
-        threading.Thread(
-            target=worker,
-            args=(thread_queue, processes, threads),
-        )
-        for thread_queue in thread_queues
-    ]
-
-    for index, triplet in enumerate(process_queue):
-        thread_queue = thread_queues[index % threads]
-        thread_queue.put(triplet)
-
-    for thread_queue in thread_queues:
-        thread_queue.put(None)
-
-    # start = time.time()
+    cache.close()  # connection of this thread
 
-    for thread in subthreads:
-        thread.start()
+    return timings
 
-    for thread in subthreads:
-        thread.join()
 
-    # stop = time.time()
+def dispatch(num, processes, threads, settings, output_queue):
+    # one instance per process, DiskStore opens a connection per thread
+    cache = DiskStore(filename, config.BaseConfig(timeout=10))
+    warmup = settings.pop("warmup")
+    operations = settings.pop("operations")
+    workers = processes * threads
+
+    # every thread generates its own operations, nothing is passed in between
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = []
+        for thread in range(threads):
+            index = num * threads + thread
+            count = operations // workers + (index < operations % workers)
+            ops = all_ops(num=index, operations=count, **settings)
+            futures.append(pool.submit(worker, cache, ops, processes, threads, warmup))
+        results = [future.result() for future in futures]
 
     timings = co.defaultdict(list)
 
-    for thread_queue in thread_queues:
-        data = thread_queue.get()
+    for data in results:
         for key in data:
             timings[key].extend(data[key])
 
-    with open("output-%s.pkl" % num, "wb") as writer:
-        pickle.dump(timings, writer, protocol=2)
+    output_queue.put(timings)
 
 
 def percentile(sequence, percent):
@@ -216,10 +205,9 @@ def percentile(sequence, percent):
 
 
 def stress_test(
-    create=True,
-    delete=True,
     processes=1,
     threads=1,
+    seed=0,
 ):
     # shutil.rmtree("tmp", ignore_errors=True)
     with suppress(FileNotFoundError):
@@ -231,25 +219,32 @@ def stress_test(
     else:
         func = mp.Process
 
+    # settings are passed explicitly, forkserver workers don't see the globals
+    # set from the command line, operations are generated in the workers
+    settings = {
+        "seed": seed,
+        "operations": OPERATIONS,
+        "key_count": KEY_COUNT,
+        "get_average": GET_AVERAGE,
+        "del_chance": DEL_CHANCE,
+        "warmup": WARMUP,
+    }
+    output_queue = mp.Queue()
+
     subprocs = [
-        func(target=dispatch, args=(num, processes, threads))
+        func(
+            target=dispatch,
+            args=(num, processes, threads, dict(settings), output_queue),
+        )
         for num in range(processes)
     ]
 
-    if create:
-        operations = list(all_ops())
-        process_queue = [[] for _ in range(processes)]
-
-        for index, ops in enumerate(operations):
-            process_queue[index % processes].append(ops)
-
-        for num in range(processes):
-            with open("input-%s.pkl" % num, "wb") as writer:
-                pickle.dump(process_queue[num], writer, protocol=2)
-
     for process in subprocs:
         process.start()
 
+    # drain results before join, a process with pending queue data never exits
+    outputs = [output_queue.get() for _ in range(processes)]
+
     for process in subprocs:
         process.join()
 
@@ -259,16 +254,9 @@ def stress_test(
 
     timings = co.defaultdict(list)
 
-    for num in range(processes):
-        with open("output-%s.pkl" % num, "rb") as reader:
-            data = pickle.load(reader)
-            for key in data:
-                timings[key] += data[key]
-
-    if delete:
-        for num in range(processes):
-            os.remove("input-%s.pkl" % num)
-            os.remove("output-%s.pkl" % num)
+    for data in outputs:
+        for key in data:
+            timings[key] += data[key]
 
     shutil.rmtree("tmp", ignore_errors=True)
 
@@ -340,18 +328,6 @@ if __name__ == "__main__":
         default=0,
         help="Random seed",
     )
-    parser.add_argument(
-        "--no-create",
-        action="store_false",
-        dest="create",
-        help="Do not create operations data",
-    )
-    parser.add_argument(
-        "--no-delete",
-        action="store_false",
-        dest="delete",
-        help="Do not delete operations data",
-    )
 
     args = parser.parse_args()
 
@@ -361,14 +337,16 @@ if __name__ == "__main__":
     DEL_CHANCE = args.del_chance
     WARMUP = int(args.warmup)
 
-    random.seed(args.seed)
+    # fork workers from a server process with diskstore already imported
+    if "forkserver" in mp.get_all_start_methods():
+        mp.set_start_method("forkserver")
+        mp.set_forkserver_preload(["diskstore"])
 
     start = time.time()
     stress_test(
-        create=args.create,
-        delete=args.delete,
         processes=args.processes,
         threads=args.threads,
+        seed=args.seed,
     )
     end = time.time()
     print("Total wall clock time: %.3f seconds" % (end - start))
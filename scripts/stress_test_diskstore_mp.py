@@ -2,6 +2,7 @@
 
 import itertools as it
 import multiprocessing as mp
+import os
 import random
 import time
 
@@ -10,6 +11,7 @@ from diskstore.config import BaseConfig
 
 KEYS = 10_000
 OPERATIONS = 100_000
+BATCH = 100
 SEED = 0
 
 functions = []
@@ -85,16 +87,25 @@ def stress_len(store):
 
 
 def stress(seed, store):
+    # pin every process to its own core, keeps the hot pages in that core's cache
+    if hasattr(os, "sched_setaffinity"):
+        cpus = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, {cpus[seed % len(cpus)]})
+
     random.seed(seed)
-    for count in range(OPERATIONS):
-        function = random.choice(functions)
-        function(store)
+    choice = random.choice
+    # commit every BATCH operations, nested writes reuse the transaction
+    for _ in range(0, OPERATIONS, BATCH):
+        with store.transact():
+            for _ in range(BATCH):
+                function = choice(functions)
+                function(store)
 
 
 def test(status=False):
     random.seed(SEED)
     # store = DiskStore("/tmp/diskstore_stress_store_mp.db")
-    store = DiskStore("/tmp/diskstore_stress_store_mp.db", BaseConfig(timeout=5))
+    store = DiskStore("/tmp/diskstore_stress_store_mp.db", BaseConfig(timeout=60))
     store.update((key, value) for key, value in enumerate(range(KEYS)))
     processes = []
 
@@ -119,4 +130,9 @@ def test(status=False):
 
 
 if __name__ == "__main__":
+    # fork workers from a server process with diskstore already imported
+    if "forkserver" in mp.get_all_start_methods():
+        mp.set_start_method("forkserver")
+        mp.set_forkserver_preload(["diskstore"])
+
     test(status=True)
@@ -1,19 +1,22 @@
 import os
 import subprocess as sp
 
+import numpy as np
+
 
 def percentile(sequence, percent):
-    if not sequence:
+    if len(sequence) == 0:
         return None
 
-    values = sorted(sequence)
+    values = np.asarray(sequence)
 
     if percent == 0:
-        return values[0]
+        return float(values.min())
 
     pos = int(len(values) * percent) - 1
 
-    return values[pos]
+    # partial sort in O(n), only the value at pos has to be in place
+    return float(np.partition(values, pos)[pos])
 
 
 def secs(value):
@@ -75,7 +78,7 @@ def display(name, timings):
     for action in ["get", "set", "delete"]:
         values = timings[action]
         len_total += len(values)
-        sum_total += sum(values)
+        sum_total += np.sum(values)
 
         print(
             template
@@ -87,7 +90,7 @@ def display(name, timings):
                 secs(percentile(values, 0.9)),
                 secs(percentile(values, 0.99)),
                 secs(percentile(values, 1.0)),
-                secs(sum(values)),
+                secs(np.sum(values)),
             )
         )
 
@@ -11,7 +11,7 @@ TIMEOUT = 10.0
 MISSING = object()
 
 DEFAULT_RO_PRAGMAS = {
-    "cache_size": 2**13,  # 8,192 pages
+    "cache_size": -(2**15),  # 32 MB, negative values are KiB, not pages
     "mmap_size": 2**28,  # 256 MB
     "temp_store": 2,  # 0=DEFAULT, 1=FILE, 2=MEMORY
     "synchronous": 1,  # 0=OFF, 1=NORMAL, 2=FULL, 3=EXTRA
@@ -19,13 +19,18 @@ DEFAULT_RO_PRAGMAS = {
 "default read only pragma settings"
 
 DEFAULT_PRAGMAS = {
+    # page_size only applies to a new DB, it must be set before journal_mode=wal
+    # and table creation (existing DBs need a VACUUM outside of WAL mode)
+    "page_size": 2**13,  # 8,192 bytes
     "auto_vacuum": 0,  # 1=FULL, 0=None
-    "cache_size": 2**13,  # 8,192 pages
+    "cache_size": -(2**15),  # 32 MB, negative values are KiB, not pages
     "journal_mode": "wal",
     "mmap_size": 2**28,  # 256 MB
     "synchronous": 1,  # 0=OFF, 1=NORMAL, 2=FULL, 3=EXTRA
     "temp_store": 2,  # 0=DEFAULT, 1=FILE, 2=MEMORY
-    # "pargma_busy_timeout": 5000,  # milliseconds
+    # 10,000 pages of 8 KB, the WAL grows to about 80 MB before a checkpoint
+    "wal_autocheckpoint": 10_000,  # pages
+    # busy timeout is set from config.timeout on every connection
 }
 "default pragma settings"
 
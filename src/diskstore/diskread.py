@@ -9,23 +9,61 @@ Examples:
 
 """
 
+import functools
+import itertools
 import os
 import os.path
 import threading
+import weakref
 from collections.abc import ItemsView, KeysView, Mapping, ValuesView
 from contextlib import closing
-from typing import Generator, Optional, Sequence, TypeAlias, Union
+from typing import Generator, Iterable, Optional, Sequence, TypeAlias, Union
 
 import apsw
 
 from .config import BaseConfig, ConfigProtocol, escape_name
-from .const import DEFAULT_RO_PRAGMAS, MISSING, TIMEOUT, KeyType
+from .const import DEFAULT_RO_PRAGMAS, TIMEOUT, KeyType
 
 Connection = apsw.Connection
 
 
 BasicType: TypeAlias = Union[bytes, str, int, float]
 
+# Open instances by id, Mapping defines __eq__ so instances are not hashable.
+_instances: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+
+def _close_after_fork() -> None:
+    """Close connections inherited from the parent in a forked child."""
+    for instance in list(_instances.values()):
+        instance.close()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_close_after_fork)
+
+
+@functools.lru_cache(maxsize=128)
+def _query_sql(
+    select: str,
+    where: Optional[str],
+    order: Optional[str],
+    limit: int | None,
+    offset: int | None,
+) -> str:
+    """Build the SQL for DiskRead.query, cached for repeated queries."""
+    where_ = " WHERE " + where if where else ""
+    order_ = " ORDER BY " + order if order else ""
+    limit_ = " LIMIT " + str(limit) if limit is not None else ""
+    offset_ = " OFFSET " + str(offset) if offset is not None else ""
+    return select + where_ + order_ + limit_ + offset_
+
+
+@functools.lru_cache(maxsize=16)
+def _in_params(count: int) -> str:
+    """Parameter list for an IN clause with *count* parameters."""
+    return "(" + ", ".join("?" * count) + ")"
+
 
 class DiskKeysView(KeysView):
     __slots__ = ()
@@ -70,13 +108,17 @@ class DiskRead(Mapping):
         Database is opened read only on demand.
 
         Args:
-           filename: filename for DB to use.
+           filename: filename for DB to use, SQLite ``file:`` URIs are supported.
            config: Configuration
 
         """
         filename = os.path.expanduser(filename)
         filename = os.path.expandvars(filename)
         self._filename = os.fspath(filename)
+        # SQLite only parses URI filenames (file:/name?vfs=memdb) with the flag
+        self._uri_flag = (
+            apsw.SQLITE_OPEN_URI if self._filename.startswith("file:") else 0
+        )
         self._config: ConfigProtocol = BaseConfig() if config is None else config
         self._timeout: float = (
             TIMEOUT
@@ -87,16 +129,19 @@ class DiskRead(Mapping):
         self._pragmas = DEFAULT_RO_PRAGMAS.copy()
         self._pragmas.update(self._config.pragmas)
         self._local = threading.local()
+        _instances[id(self)] = self
 
         # precreated statements based on tablename and value_class
         tablename = escape_name(self._config.tablename)
         fields = ", ".join(f"{escape_name(field)}" for field, *_ in self._config.fields)
         self._statements: dict[str, str] = {
             "GET": f"SELECT _key, {fields} FROM {tablename} WHERE _key = ? LIMIT 1",
-            "CONTAINS": f"SELECT _key FROM {tablename} WHERE _key = ? LIMIT 1",
+            "GET_MANY": f"SELECT _key, {fields} FROM {tablename} WHERE _key IN ",
+            "CONTAINS": f"SELECT EXISTS (SELECT 1 FROM {tablename} WHERE _key = ?)",
             "ITER": f"SELECT _key FROM {tablename} ORDER BY rowid ASC",
             "REVERSED": f"SELECT _key FROM {tablename} ORDER BY rowid DESC",
-            "COUNT": f"SELECT COUNT (_key) FROM {tablename}",
+            # count(*) uses the b-tree count optimization, _key is NOT NULL
+            "COUNT": f"SELECT COUNT(*) FROM {tablename}",
             "QUERY": f"SELECT _key, {fields} FROM {tablename}",
         }
 
@@ -117,21 +162,13 @@ class DiskRead(Mapping):
 
     @property
     def _con(self) -> Connection:
-        # Check process ID to support process forking. If the process
-        # ID changes, close the connection and update the process ID.
-
-        local_pid = getattr(self._local, "pid", None)
-        pid: int = os.getpid()
-
-        if local_pid != pid:
-            self.close()
-            self._local.pid = pid
-
+        # Connections inherited by a forked child are closed in the
+        # register_at_fork handler, no process ID check needed per call.
         con = getattr(self._local, "con", None)
 
         if con is None:
             con = self._local.con = Connection(
-                self._filename, flags=apsw.SQLITE_OPEN_READONLY
+                self._filename, flags=apsw.SQLITE_OPEN_READONLY | self._uri_flag
             )
             con.set_busy_timeout(int(self._timeout * 1000))
 
@@ -144,14 +181,50 @@ class DiskRead(Mapping):
 
     def __getitem__(self, key: KeyType):
         """Get value for *key*, raises KeyError if not found."""
-        select = self._statements["GET"]
-        with closing(self._con.execute(select, (key,))) as cx:
-            row = next(cx, MISSING)
+        # the cursor is released as soon as the single row is fetched
+        row = self._con.execute(self._statements["GET"], (key,)).fetchone()
 
-        if row is MISSING:
+        if row is None:
             raise KeyError(key)
 
-        return self._load_data(row)  # ty:ignore[invalid-argument-type]
+        return self._load_data(row)
+
+    def get(self, key: object, default=None):
+        """Return value for *key* if it exists, else *default*.
+
+        One query and no KeyError raised for a missing key, use it instead
+        of checking with ``in`` before getting the value.
+        """
+        row = self._con.execute(self._statements["GET"], (key,)).fetchone()
+
+        if row is None:
+            return default
+
+        return self._load_data(row)
+
+    def get_many(self, keys: Iterable[KeyType], chunk_size: int = 500) -> dict:
+        """Return a dict with the values of all existing *keys*.
+
+        Keys are selected with ``_key IN (...)`` in chunks of *chunk_size*,
+        one query per chunk instead of one per key. Missing keys are not
+        part of the result. *chunk_size* must be at least 1 and must not
+        exceed SQLite's limit of bound parameters per statement
+        (``SQLITE_LIMIT_VARIABLE_NUMBER``, 32766 by default), or the query
+        fails.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        result = {}
+        keys_ = iter(keys)
+        select = self._statements["GET_MANY"]
+        load_data = self._load_data
+        con = self._con
+
+        while chunk := tuple(itertools.islice(keys_, chunk_size)):
+            for row in con.execute(select + _in_params(len(chunk)), chunk):
+                result[row[0]] = load_data(row)
+
+        return result
 
     def keys(self):
         """Return a set-like view of keys in the mapping."""
@@ -168,13 +241,15 @@ class DiskRead(Mapping):
 
         return DiskItemsView(self)
 
-    def query(
+    def query(  # noqa: PLR0913
         self,
         where: Optional[str] = None,
         parameters: Optional[Sequence | dict] = None,
         order: Optional[str] = None,
         limit: int | None = None,
         offset: int | None = None,
+        *,
+        raw: bool = False,
     ) -> Generator[tuple, None, None]:
         """Query rows with optional filtering, ordering, limit and offset.
 
@@ -184,6 +259,8 @@ class DiskRead(Mapping):
             order: ORDER BY clause (without the ORDER BY keyword).
             limit: Maximum number of rows to return.
             offset: Number of rows to skip.
+            raw: Yield the value as plain tuple of the selected columns,
+                without converting it with the configuration.
 
         Yields:
             (key, value) tuples.
@@ -195,22 +272,23 @@ class DiskRead(Mapping):
             [(2, 'two'), (3, 'three')]
 
         """
-        where_ = " WHERE " + where if where else ""
         parameters_ = () if parameters is None else parameters
-        order_ = " ORDER BY " + order if order else ""
-        limit_ = " LIMIT " + str(limit) if limit is not None else ""
-        offset_ = " OFFSET " + str(offset) if offset is not None else ""
-        select = self._statements["QUERY"] + where_ + order_ + limit_ + offset_
+        select = _query_sql(self._statements["QUERY"], where, order, limit, offset)
 
         with closing(self._con.execute(select, parameters_)) as cursor:
-            for row in cursor:
-                yield row[0], self._load_data(row)
+            if raw:
+                for row in cursor:
+                    yield row[0], row[1:]
+            else:
+                load_data = self._load_data
+                for row in cursor:
+                    yield row[0], load_data(row)
 
     def __contains__(self, key: object) -> bool:
         """Check if *key* exists in the store."""
-        with closing(self._con.execute(self._statements["CONTAINS"], (key,))) as cx:
-            row = cx.fetchone()
-        return row is not None
+        row = self._con.execute(self._statements["CONTAINS"], (key,)).fetchone()
+        assert row is not None  # SELECT EXISTS always returns one row
+        return row[0] == 1
 
     def __iter__(self):
         """Iterate over keys in insertion order."""
@@ -250,7 +328,8 @@ class DiskRead(Mapping):
     def __len__(self):
         """Return the number of items in the store.
 
-        To do this count is used which is not a performant implementation.
+        Counts the entries of the smallest b-tree of the table, this is
+        exact but still has to visit all its pages.
         """
         select = self._statements["COUNT"]
 
@@ -9,12 +9,16 @@ Examples:
 
 """
 
+import ctypes
+import itertools
 import os
 import os.path
+import sys
 import threading
+import uuid
 from collections.abc import Mapping, MutableMapping
 from contextlib import closing, contextmanager
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator
 
 import apsw
 
@@ -35,9 +39,16 @@ class DiskStore(DiskRead, MutableMapping):
         """SQLite based MutableMapping disk storage.
 
         Args:
-            filename: DiskStore DB filename.
+            filename: DiskStore DB filename, SQLite ``file:`` URIs are supported.
+                ``:memory:`` creates a new in memory DB shared by all threads.
+                Like a plain ``:memory:`` DB its size is only limited by RAM.
             config: Configuration as specified in ConfigProtocol
         """
+        self._memory = filename == ":memory:"
+        if self._memory:
+            # every thread has its own connection, a plain :memory: DB would
+            # be private to one of them, a named memdb is shared
+            filename = f"file:/diskstore-{uuid.uuid4().hex}?vfs=memdb"
         super().__init__(filename=filename, config=config)
         self._txn_id = None
         tablename = escape_name(self._config.tablename)
@@ -72,7 +83,8 @@ class DiskStore(DiskRead, MutableMapping):
                 "POP": (
                     f"DELETE FROM {tablename} WHERE _key = ? RETURNING _key, {fields}"
                 ),
-                "CLEAR": f"DELETE FROM {tablename};VACUUM;",
+                # without WHERE SQLite truncates the table b-trees at once
+                "CLEAR": f"DELETE FROM {tablename}",
                 "POPITEM": (
                     f"DELETE FROM {tablename}"
                     f" WHERE rowid = (SELECT MAX(rowid) FROM {tablename})"
@@ -86,21 +98,24 @@ class DiskStore(DiskRead, MutableMapping):
 
     @property
     def _con(self) -> Connection:
-        # Check process ID to support process forking. If the process
-        # ID changes, close the connection and update the process ID.
-
-        local_pid = getattr(self._local, "pid", None)
-        pid: int = os.getpid()
-
-        if local_pid != pid:
-            self.close()
-            self._local.pid = pid
-
+        # Connections inherited by a forked child are closed in the
+        # register_at_fork handler, no process ID check needed per call.
         con = getattr(self._local, "con", None)
 
         if con is None:
-            con = Connection(self._filename)
+            con = Connection(
+                self._filename,
+                flags=apsw.SQLITE_OPEN_READWRITE
+                | apsw.SQLITE_OPEN_CREATE
+                | self._uri_flag,
+            )
             con.set_busy_timeout(int(self._timeout * 1000))
+            if self._memory:
+                # memdb databases are limited to 1 GiB by default, lift it
+                size_limit = ctypes.c_int64(sys.maxsize)
+                con.file_control(
+                    "main", apsw.SQLITE_FCNTL_SIZE_LIMIT, ctypes.addressof(size_limit)
+                )
 
             # Some SQLite pragmas work on a per-connection basis so
             # apply them all on fresh connection
@@ -205,26 +220,24 @@ class DiskStore(DiskRead, MutableMapping):
             pass
 
     def add(self, key: KeyType | None, value: Iterable) -> KeyType | None:
-        with closing(
-            self._con.execute(self._statements["ADD"], self._dump_value(key, value))
-        ) as cx:
-            rows = cx.fetchall()
+        row = self._con.execute(
+            self._statements["ADD"], self._dump_value(key, value)
+        ).fetchone()
 
-        if not rows:
+        if row is None:
             return None
 
-        return rows[0][0]
+        return row[0]
 
     def pop(self, key: KeyType, default=MISSING):
-        with closing(self._con.execute(self._statements["POP"], (key,))) as cx:
-            rows = cx.fetchall()
+        row = self._con.execute(self._statements["POP"], (key,)).fetchone()
 
-        if not rows:
+        if row is None:
             if default is MISSING:
                 raise KeyError(key)
             return default
 
-        return self._load_data(rows[0])
+        return self._load_data(row)
 
     def popitem(self):
         with self.transact() as cursor:
@@ -237,8 +250,7 @@ class DiskStore(DiskRead, MutableMapping):
         return key, value
 
     def __delitem__(self, key: KeyType) -> None:
-        with closing(self._con.execute(self._statements["DELETE"], (key,))) as cx:
-            row = cx.fetchone()
+        row = self._con.execute(self._statements["DELETE"], (key,)).fetchone()
         if row is None:
             raise KeyError(key)
 
@@ -251,12 +263,18 @@ class DiskStore(DiskRead, MutableMapping):
                     self.add(key, default)
                 return default
 
-    def check(self, vacuum=False):
+    def check(self, vacuum=False, quick=False):
+        """Check integrity of the database and return the error messages.
+
+        With *quick* ``PRAGMA quick_check`` is used, it skips the
+        verification of index content and runs in linear time.
+        """
         warns = []
         sql = self._con.execute
+        pragma = "PRAGMA quick_check" if quick else "PRAGMA integrity_check"
 
         # Check integrity of database.
-        with closing(sql("PRAGMA integrity_check")) as cx:
+        with closing(sql(pragma)) as cx:
             rows = cx.fetchall()
 
         if len(rows) != 1 or rows[0][0] != "ok":
@@ -270,9 +288,68 @@ class DiskStore(DiskRead, MutableMapping):
         return warns
 
     def clear(self) -> None:
+        """Remove all items, the table and its indexes are kept.
+
+        Freed pages are reused for new items, ``check(vacuum=True)``
+        shrinks the database file.
+        """
         with closing(self._con.execute(self._statements["CLEAR"])):
             pass
 
+    def create_index(self, *columns: str) -> str:
+        """Create an index on value *columns* if it does not exist.
+
+        Queries with a ``where`` clause on these columns use the index
+        instead of scanning the whole table. Every index slows down
+        writes, only create the ones used by frequent queries.
+
+        The index is named ``ix_<table>(<column>,...)``. If an index with
+        this name already exists on another table or other columns a
+        ValueError is raised.
+
+        Returns:
+            Name of the index.
+        """
+        tablename = self._config.tablename
+        fields = {field for field, *_ in self._config.fields}
+        if not columns:
+            raise ValueError("At least one column is required.")
+        for column in columns:
+            if column not in fields:
+                raise ValueError(f"Unknown column {column!r}.")
+        name = f"ix_{tablename}({','.join(columns)})"
+        with self.transact() as cursor:
+            row = cursor.execute(
+                "SELECT tbl_name FROM sqlite_master WHERE type = 'index' AND name = ?",
+                (name,),
+            ).fetchone()
+            if row is None:
+                cursor.execute(
+                    f"CREATE INDEX {escape_name(name)} ON {escape_name(tablename)}"
+                    f"({', '.join(escape_name(column) for column in columns)})"
+                )
+            else:
+                indexed = tuple(
+                    info[2]
+                    for info in cursor.execute(
+                        f"PRAGMA index_info({escape_name(name)})"
+                    )
+                )
+                if row[0] != tablename or indexed != columns:
+                    raise ValueError(
+                        f"Index {name!r} exists on {row[0]!r} columns {indexed}."
+                    )
+        return name
+
+    @staticmethod
+    def _iter_items(other: Iterable) -> Iterator[tuple[Any, Any]]:
+        """Iterate (key, value) pairs like ``dict.update()`` takes them."""
+        if isinstance(other, Mapping):
+            return iter(other.items())
+        if hasattr(other, "keys"):
+            return ((key, other[key]) for key in other.keys())  # ty:ignore[call-non-callable, not-subscriptable]
+        return iter(other)
+
     def update(self, other=(), /, **kwargs):
         """Bulk upsert from a mapping or iterable.
 
@@ -282,26 +359,47 @@ class DiskStore(DiskRead, MutableMapping):
         """
         with self.transact() as cursor:
             if other:
-                if isinstance(other, Mapping):
-                    cursor.executemany(
-                        self._statements["SET"],
-                        (self._dump_value(key, value) for key, value in other.items()),
-                    )
-                elif hasattr(other, "keys"):
-                    cursor.executemany(
-                        self._statements["SET"],
-                        (self._dump_value(key, other[key]) for key in other.keys()),
-                    )
-                else:
-                    cursor.executemany(
-                        self._statements["SET"],
-                        (self._dump_value(key, value) for key, value in other),
-                    )
+                cursor.executemany(
+                    self._statements["SET"],
+                    (
+                        self._dump_value(key, value)
+                        for key, value in self._iter_items(other)
+                    ),
+                )
             if kwargs:
                 cursor.executemany(
                     self._statements["SET"],
                     (self._dump_value(key, value) for key, value in kwargs.items()),
                 )
 
+    def bulk_update(self, other: Iterable = (), /, chunk_size: int = 10_000) -> None:
+        """Bulk upsert from a mapping or iterable in chunks.
+
+        Every chunk of *chunk_size* items is committed in its own
+        transaction. Unlike ``update()`` the load is not atomic, but the WAL
+        can be checkpointed between chunks and does not grow with the whole
+        load. Inside of ``transact()`` all chunks share that transaction.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        items = self._iter_items(other)
+        dump_value = self._dump_value
+
+        while chunk := [
+            dump_value(key, value) for key, value in itertools.islice(items, chunk_size)
+        ]:
+            with self.transact() as cursor:
+                cursor.executemany(self._statements["SET"], chunk)
+
+    def delete_many(self, keys: Iterable[KeyType]) -> int:
+        """Bulk delete of keys, missing keys are ignored.
+
+        Wrapped in ``transact()`` like ``update()``. Returns the number of
+        deleted items.
+        """
+        with self.transact() as cursor:
+            cursor.executemany(self._statements["DELETE"], ((key,) for key in keys))
+            return sum(1 for _ in cursor)
+
     def get_readonly_instance(self):
         return DiskRead(self._filename, self._config)
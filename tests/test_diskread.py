@@ -21,8 +21,8 @@ def store_file():
     filename = os.path.join(directory, "diskstore.db")
     with DiskStore(filename) as store:
         store.update(data)
+    # writer is closed, only read only connections use the file
     yield filename
-    store.close()
     shutil.rmtree(directory, ignore_errors=True)
 
 
@@ -34,13 +34,13 @@ def ro_store(store_file):
 
 
 def test_init(store_file) -> None:
-    dr = DiskRead(store_file)
-    assert dr[0] == "0"
+    with DiskRead(store_file) as dr:
+        assert dr[0] == "0"
 
 
 def test_init_tablename(store_file) -> None:
-    dr = DiskRead(store_file, BaseConfig(tablename="DiskStore"))
-    assert dr[0] == "0"
+    with DiskRead(store_file, BaseConfig(tablename="DiskStore")) as dr:
+        assert dr[0] == "0"
 
 
 # def test_init_value_class(store_file) -> None:
@@ -49,8 +49,8 @@ def test_init_tablename(store_file) -> None:
 
 
 def test_init_timeout(store_file) -> None:
-    dr = DiskRead(store_file, BaseConfig(timeout=1.0))
-    assert dr[0] == "0"
+    with DiskRead(store_file, BaseConfig(timeout=1.0)) as dr:
+        assert dr[0] == "0"
 
 
 def test_init_error() -> None:
@@ -83,6 +83,15 @@ def test_get(ro_store) -> None:
     assert not ro_store.get(1000)
 
 
+def test_get_many(ro_store) -> None:
+    assert ro_store.get_many([1, 3, 100]) == {1: "1", 3: "3"}
+    assert ro_store.get_many(range(1000)) == data
+    assert ro_store.get_many(range(10), chunk_size=3) == data
+    assert ro_store.get_many([]) == {}
+    with pytest.raises(ValueError, match="chunk_size"):
+        ro_store.get_many([1], chunk_size=0)
+
+
 def test_query_all(ro_store) -> None:
     for key, value in ro_store.query():
         assert data[key] == value
@@ -118,6 +127,11 @@ def test_query_limit_offset(ro_store) -> None:
     assert result == [(4, "4"), (5, "5")]
 
 
+def test_query_raw(ro_store) -> None:
+    result = list(ro_store.query(order="rowid ASC", limit=2, raw=True))
+    assert result == [(0, ("0",)), (1, ("1",))]
+
+
 def test_contains(ro_store) -> None:
     assert 9 in ro_store
 
@@ -1,5 +1,6 @@
 """Test diskstore.DiskStore."""
 
+import ctypes
 import datetime
 import io
 import json
@@ -7,6 +8,7 @@ import os.path
 import pathlib
 import pickle
 import shutil
+import sys
 import tempfile
 import threading
 import time
@@ -16,6 +18,7 @@ from dataclasses import asdict, astuple, dataclass, fields
 from typing import ClassVar, NamedTuple, Optional
 from unittest import mock
 
+import apsw
 import pytest
 
 from diskstore import DiskRead, DiskStore
@@ -45,7 +48,6 @@ def tmpfilename(tmpdir):
 def store(tmpfilename):
     with DiskStore(tmpfilename) as store:
         yield store
-    store.close()
     # if store.filename and store.filename != ":memory:":
     #     os.remove(store.filename)
 
@@ -286,6 +288,29 @@ def test_close_error(store) -> None:
         store.close()
 
 
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded")
+def test_fork(store) -> None:
+    store["parent"] = 1
+    parent_con = store._con
+
+    pid = os.fork()
+    if pid == 0:  # child, new connection for the inherited instance
+        exitcode = 1
+        try:
+            if getattr(store._local, "con", None) is None:
+                store["child"] = store["parent"] + 1
+                exitcode = 0
+        finally:
+            os._exit(exitcode)
+
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert store._con is parent_con
+    assert store["child"] == 2
+
+
 def test_getsetdel(store) -> None:
     values = [
         1234,
@@ -341,6 +366,54 @@ def test_getsetdel_memory() -> None:
     assert store.check() == []
 
 
+def test_memory_threads() -> None:
+    store = DiskStore(":memory:")
+    store["key"] = "value"
+
+    result = []
+    thread = threading.Thread(target=lambda: result.append(store["key"]))
+    thread.start()
+    thread.join()
+
+    assert result == ["value"]
+    with DiskStore(":memory:") as other:
+        assert "key" not in other
+
+    # no 1 GiB memdb default size limit, like a plain :memory: DB
+    size_limit = ctypes.c_int64(-1)
+    store._con.file_control(
+        "main", apsw.SQLITE_FCNTL_SIZE_LIMIT, ctypes.addressof(size_limit)
+    )
+    assert size_limit.value == sys.maxsize
+    store.close()
+
+
+def test_uri_shared_memory() -> None:
+    # memdb VFS is shared between connections, shared-cache is not in apsw
+    cwd_files = set(os.listdir())
+    store = DiskStore("file:/test_uri_shared_memory?vfs=memdb")
+    store["key"] = "value"
+    # memdb has no WAL support, the URI parameter took effect
+    assert store._con.pragma("journal_mode") == "memory"
+    assert set(os.listdir()) == cwd_files
+
+    result = []
+    thread = threading.Thread(target=lambda: result.append(store["key"]))
+    thread.start()
+    thread.join()
+
+    assert result == ["value"]
+    store.close()
+
+
+def test_uri_filename(tmpfilename) -> None:
+    store = DiskStore(f"file:{tmpfilename}?mode=rwc")
+    store["key"] = "value"
+    store.close()
+
+    assert DiskRead(tmpfilename)["key"] == "value"
+
+
 def test_value(store) -> None:
     values = {
         "i": 1234,
@@ -451,6 +524,42 @@ def test_update_with_kv_direct(store):
     assert store["some_thing"]
 
 
+def test_bulk_update(store) -> None:
+    store.bulk_update(((key, str(key)) for key in range(10)), chunk_size=3)
+    store.bulk_update({"one": 1, "two": 2})
+    store.bulk_update([(0, "zero")], chunk_size=1)
+
+    assert len(store) == 12
+    assert store[0] == "zero"
+    assert store[9] == "9"
+    assert store["two"] == 2
+
+
+def test_bulk_update_chunk_size(store) -> None:
+    for chunk_size in (0, -1):
+        with pytest.raises(ValueError, match="chunk_size"):
+            store.bulk_update([(0, "zero")], chunk_size=chunk_size)
+
+    assert len(store) == 0
+
+
+def test_bulk_update_in_transaction(store) -> None:
+    with pytest.raises(RuntimeError), store.transact():
+        store.bulk_update(((key, key) for key in range(10)), chunk_size=3)
+        raise RuntimeError("rollback")
+
+    assert len(store) == 0
+
+
+def test_delete_many(store) -> None:
+    store.update((key, str(key)) for key in range(10))
+
+    assert store.delete_many(key for key in range(0, 20, 2)) == 5
+    assert len(store) == 5
+    assert list(store) == [1, 3, 5, 7, 9]
+    assert store.delete_many([]) == 0
+
+
 def test_update_from_other_diskstore(tmpdir) -> None:
     class MyData(NamedTuple):
         name: str
@@ -789,6 +898,8 @@ def test_get(store) -> None:
     assert store.get(0) is None
     assert store.get(1, "dne") == "dne"
     assert store.get(2, {}) == {}
+    store[0] = 0
+    assert store.get(0, "dne") == 0
 
 
 def test_query_all(store) -> None:
@@ -986,8 +1097,7 @@ def test_check_vacuum(store) -> None:
 
 
 def test_integrity_check(store) -> None:
-    for value in range(1000):
-        store[value] = value
+    store.update((value, value) for value in range(1000))
 
     store.close()
 
@@ -997,25 +1107,86 @@ def test_integrity_check(store) -> None:
 
     store = DiskStore(store.filename)
 
+    assert len(store.check(quick=True)) > 0
+
     warns = store.check(vacuum=True)
 
     assert len(warns) > 0
     print(warns)
 
     assert len(store.check()) == 0
+    assert store.check(quick=True) == []
     store.close()
 
 
 def test_clear(store) -> None:
     num_items = 100
-    for value in range(num_items):
-        store[value] = value
+    store.update((value, value) for value in range(num_items))
     assert len(store) == num_items
     store.clear()
     assert len(store) == 0
     assert len(store.check()) == 0
 
 
+def test_clear_keeps_index(store) -> None:
+    store.update((value, value) for value in range(100))
+    with store.transact() as cursor:
+        cursor.execute(f"CREATE INDEX idx_value ON {store.tablename}(value)")
+
+    store.clear()
+
+    assert len(store) == 0
+    with store.transact() as cursor:
+        indexes = cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name = ?",
+            ("idx_value",),
+        ).fetchall()
+    assert indexes == [("idx_value",)]
+
+
+def test_create_index(store) -> None:
+    store.update(((f"order#{i}", i % 100) for i in range(1, 1000)))
+
+    name = store.create_index("value")
+    assert store.create_index("value") == name
+
+    with store.transact() as cursor:
+        plan = cursor.execute(
+            f"EXPLAIN QUERY PLAN SELECT * FROM {store.tablename} WHERE value = 50"
+        ).fetchall()
+    assert name in str(plan)
+    assert len(list(store.query(where="value = 50"))) == 10
+
+    with pytest.raises(ValueError, match="Unknown column"):
+        store.create_index("_key")
+    with pytest.raises(ValueError, match="At least one column"):
+        store.create_index()
+
+
+def test_create_index_names(tmpfilename) -> None:
+    class MyData(NamedTuple):
+        a: int
+        b: int
+        a_b: int
+
+    store = DiskStore(tmpfilename, NamedTupleConfig(value_class=MyData))
+    name_a_b = store.create_index("a", "b")
+    name_ab = store.create_index("a_b")
+    assert name_a_b != name_ab
+
+    with store.transact() as cursor:
+        for name, columns in ((name_a_b, ["a", "b"]), (name_ab, ["a_b"])):
+            info = cursor.execute("SELECT * FROM pragma_index_info(?)", (name,))
+            assert [row[2] for row in info] == columns
+
+    # an index with the same name on other columns is not silently reused
+    with store.transact() as cursor:
+        cursor.execute(f'CREATE INDEX "ix_MyData(b)" ON {store.tablename}(a)')
+    with pytest.raises(ValueError, match="exists on"):
+        store.create_index("b")
+    store.close()
+
+
 def test_with(store) -> None:
     with DiskStore(store.filename) as tmp:
         tmp["a"] = 0
@@ -1338,38 +1509,45 @@ def test_timeout(tmpfilename):
 def test_busy_raise_error(tmpfilename):
     store = DiskStore(tmpfilename, BaseConfig(timeout=0.001))
     store.open()
+    locked = threading.Event()
+    release = threading.Event()
 
     def thread_run():
         with store.transact():
             store[1] = "2"
-            time.sleep(0.2)
+            locked.set()
+            release.wait(5)
 
     thread = threading.Thread(target=thread_run)
     thread.start()
 
-    time.sleep(0.05)
+    assert locked.wait(5)
     with pytest.raises(BusyError):
         with store.transact():
             store[1] = "1"
 
+    release.set()
     thread.join()
     store.close()
 
 
 def test_busy_retry(tmpfilename):
     store = DiskStore(tmpfilename, BaseConfig(timeout=1))
+    locked = threading.Event()
 
     def thread_run():
         with store.transact():
             store[1] = "2"
-            time.sleep(0.1)
+            locked.set()
+            time.sleep(0.02)  # the main thread waits in the busy handler
 
     thread = threading.Thread(target=thread_run)
     thread.start()
 
-    time.sleep(0.02)
+    assert locked.wait(5)
     with store.transact():
         store[1] = "1"
 
     thread.join()
+    assert store[1] == "1"
     store.close()